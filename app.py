@@ -5,13 +5,27 @@ Water Buddy - Streamlit version
 
 import streamlit as st
 import json
+import math
+import bisect
+import csv
 from datetime import datetime, date, timedelta
 import io
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
+import mmap
+import os
+import string
+import threading
+from collections import Counter
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple
+from typing import TYPE_CHECKING, Optional, List, Dict, Tuple
+
+try:
+    import orjson  # optional: several times faster JSON parse/serialize
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    import altair as alt
+    import pandas as pd
 
 # ---------------------------
 # Streamlit page config
@@ -24,27 +38,222 @@ st.set_page_config(page_title="Water Buddy", layout="wide", initial_sidebar_stat
 HERE = Path(__file__).parent
 DATA_DIR = HERE / "water_buddy_data"
 PROFILE_FILE = DATA_DIR / "profile.json"
-LOGS_FILE = DATA_DIR / "logs.json"
+LOGS_FILE = DATA_DIR / "logs.jsonl"  # one JSON object per line, append-only
+LEGACY_LOGS_FILE = DATA_DIR / "logs.json"
 BADGES_FILE = DATA_DIR / "badges.json"
 BASE_ML_PER_KG = 35  # ml per kg base guideline
+SUMMARY_DAYS = 14  # longest window any UI block needs
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Client-side reminder script; $interval_minutes and $auto_start are filled
+# in from session_state on each run.
+NOTIFICATION_JS = string.Template("""
+<script>
+const intervalMinutes = $interval_minutes;
+let timerId = null;
+function askPermissionAndStart() {
+    if (!("Notification" in window)) {
+        console.log("This browser does not support notifications.");
+        return;
+    }
+    if (Notification.permission === "granted") {
+        startTimer();
+    } else if (Notification.permission !== "denied") {
+        Notification.requestPermission().then(permission => {
+            if (permission === "granted") startTimer();
+        });
+    }
+}
+function startTimer() {
+    if (timerId) clearInterval(timerId);
+    timerId = setInterval(() => {
+        const notif = new Notification("Water Buddy — Time to sip!", {
+            body: "Open the app to log a quick drink. Stay hydrated! 💧",
+            icon: ""
+        });
+        setTimeout(()=>notif.close(), 8000);
+    }, intervalMinutes * 60 * 1000);
+}
+function stopTimer() {
+    if (timerId) clearInterval(timerId);
+    timerId = null;
+}
+window.startWaterBuddyReminders = askPermissionAndStart;
+window.stopWaterBuddyReminders = stopTimer;
+if ($auto_start) {
+    askPermissionAndStart();
+}
+</script>
+""")
+
 # ---------------------------
 # JSON Helpers
 # ---------------------------
+def json_loads(data: bytes):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def json_line(obj) -> str:
+    # Compact single-line encoding used for JSON Lines records.
+    if orjson:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+@st.cache_data(show_spinner=False)
+def _load_json(path_str: str, mtime_ns: int):
+    # mtime_ns is only part of the cache key: a write to the file changes it,
+    # so every rerun between writes is served from memory instead of disk.
+    with open(path_str, "rb") as f:
+        return json_loads(f.read())
+
 def read_json(path: Path, default):
-    if not path.exists():
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
         return default
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_json(str(path), mtime_ns)
     except Exception:
         return default
 
 def write_json(path: Path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if orjson:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    # Coarse filesystem timestamps could leave mtime unchanged on fast
+    # successive writes, so drop cached reads explicitly too.
+    _load_json.clear()
+
+@st.cache_resource(show_spinner=False)
+def _jsonl_state(path_str: str) -> Dict:
+    # Parsed rows plus the byte offset they cover. The file is append-only, so
+    # a read only has to parse the lines added since the previous one.
+    state = {"lock": threading.Lock()}
+    _reset_jsonl_state(state)
+    return state
+
+def _reset_jsonl_state(state: Dict):
+    state.update(offset=0, rows=[], keys=[], ordered=True)
+
+def _is_iso_date(value) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        date.fromisoformat(value[:10])
+    except ValueError:
+        return False
+    return True
+
+def _add_jsonl_row(state: Dict, row: Dict):
+    # keys stay bisectable only while every logged_at is an ISO date in order
+    key = row.get("logged_at")
+    if state["ordered"] and not (_is_iso_date(key) and (not state["keys"] or key >= state["keys"][-1])):
+        state["ordered"] = False
+    state["keys"].append(key if isinstance(key, str) else "")
+    state["rows"].append(row)
+
+def _parse_jsonl_line(state: Dict, line: bytes) -> bool:
+    if not line.strip():
+        return False
+    try:
+        row = json_loads(line)
+    except ValueError:
+        # skip a torn/corrupt line rather than losing the whole history
+        return False
+    # only objects are records; null, numbers or arrays are skipped too
+    if not isinstance(row, dict):
+        return False
+    _add_jsonl_row(state, row)
+    return True
+
+def read_jsonl(path: Path, default, copy: bool = True):
+    state = _jsonl_state(str(path))
+    with state["lock"]:
+        try:
+            stat = path.stat()
+        except OSError:
+            _reset_jsonl_state(state)
+            return default
+        size, file_id = stat.st_size, (stat.st_dev, stat.st_ino)
+        # a shrunk or replaced file invalidates everything parsed so far
+        if size < state["offset"] or file_id != state.get("file_id"):
+            _reset_jsonl_state(state)
+            state["file_id"] = file_id
+        if size > state["offset"]:
+            try:
+                with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    start = state["offset"]
+                    # stop at the last newline so a half-written line waits for the next read
+                    end = max(mm.rfind(b"\n", start) + 1, start)
+                    for line in mm[start:end].splitlines():
+                        _parse_jsonl_line(state, line)
+                    # ...unless it is already a whole object, as in a file saved without a final newline
+                    if _parse_jsonl_line(state, mm[end:]):
+                        end = len(mm)
+                    state["offset"] = end
+            except (OSError, ValueError):
+                return default
+        # copy=False hands back the shared list itself for read-only callers
+        # that would otherwise pay an O(N) copy on every call.
+        return list(state["rows"]) if copy else state["rows"]
+
+def write_jsonl(path: Path, rows: List):
+    state = _jsonl_state(str(path))
+    with state["lock"]:
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json_line(row) + "\n")
+        _reset_jsonl_state(state)
+
+@st.cache_resource(show_spinner=False)
+def _appender(path_str: str) -> Dict:
+    # One long-lived append handle per file, shared across reruns and
+    # sessions, instead of an open/close pair on every logged sip.
+    return {"file": None, "lock": threading.Lock()}
+
+def _open_append(path: Path):
+    # newline="" keeps the bytes written equal to the encoded line.
+    f = open(path, "a", encoding="utf-8", newline="")
+    # Terminate a last line saved without a newline so the next entry
+    # doesn't get glued onto it.
+    if f.tell() > 0:
+        with open(path, "rb") as tail:
+            tail.seek(-1, os.SEEK_END)
+            if tail.read(1) != b"\n":
+                f.write("\n")
+                f.flush()
+    return f
+
+def append_jsonl(path: Path, row):
+    handle = _appender(str(path))
+    line = json_line(row) + "\n"
+    state = _jsonl_state(str(path))
+    with handle["lock"]:
+        f = handle["file"]
+        # Reopen if the file was deleted or replaced behind the cached
+        # handle; writes would otherwise land in an unlinked inode.
+        try:
+            stale = f is None or os.fstat(f.fileno()).st_ino != path.stat().st_ino
+        except OSError:
+            stale = True
+        if stale:
+            if f is not None:
+                f.close()
+            f = handle["file"] = _open_append(path)
+            with state["lock"]:
+                _reset_jsonl_state(state)
+        f.write(line)
+        f.flush()
+        end = f.tell()
+        with state["lock"]:
+            # If the parsed rows were up to date right before this line, add
+            # the row in memory so the next read needn't touch the file.
+            if state["offset"] == end - len(line.encode("utf-8")):
+                _add_jsonl_row(state, row)
+                state["offset"] = end
 
 # ---------------------------
 # Data functions
@@ -62,71 +271,132 @@ def set_profile(name: str, age: int, weight_kg: float, activity: str):
     }
     write_json(PROFILE_FILE, data)
 
-def read_logs() -> List[Dict]:
-    return read_json(LOGS_FILE, [])
+def read_logs(copy: bool = True) -> List[Dict]:
+    return read_jsonl(LOGS_FILE, [], copy=copy)
+
+def read_logs_index() -> Tuple[List[Dict], Optional[List[str]]]:
+    # The shared rows plus their sorted logged_at keys, or None for the keys
+    # when the rows are not known to be in order.
+    read_logs(copy=False)
+    state = _jsonl_state(str(LOGS_FILE))
+    with state["lock"]:
+        return state["rows"], (state["keys"] if state["ordered"] else None)
+
+def _clear_log_caches():
+    # every cache derived from logs.jsonl; mtime alone can miss fast writes
+    _summarize.clear()
+    _logs_frame.clear()
+    _logs_csv.clear()
 
 def write_logs(logs: List[Dict]):
-    write_json(LOGS_FILE, logs)
+    write_jsonl(LOGS_FILE, logs)
+    _clear_log_caches()
 
-def log_water_ml(amount_ml: int):
-    logs = read_logs()
-    logs.append({
-        "logged_at": datetime.utcnow().isoformat(),
+def migrate_legacy_logs():
+    # Older versions kept every log in a single JSON array that was rewritten
+    # on each sip; convert it once and keep the original as a backup.
+    if LOGS_FILE.exists() or not LEGACY_LOGS_FILE.exists():
+        return
+    # Read once directly; going through read_json would leave the whole
+    # legacy array pinned in the st.cache_data store after migration.
+    try:
+        with open(LEGACY_LOGS_FILE, "rb") as f:
+            logs = json_loads(f.read())
+    except Exception:
+        logs = []
+    write_logs(logs if isinstance(logs, list) else [])
+    LEGACY_LOGS_FILE.rename(LEGACY_LOGS_FILE.with_name("logs.json.bak"))
+
+def log_water_ml(amount_ml: int, profile: Optional[Dict] = None, goal: Optional[int] = None):
+    now = datetime.utcnow()
+    entry = {
+        "logged_at": now.isoformat(),
+        "date": now.date().isoformat(),
         "amount_ml": int(amount_ml)
-    })
-    write_logs(logs)
-    check_badges_and_streaks()
-
-def get_totals_for_days(days: int = 7) -> List[Dict]:
-    logs = read_logs()
-    results = []
-    for i in range(days - 1, -1, -1):
-        d = date.today() - timedelta(days=i)
-        total = 0
-        for log in logs:
-            try:
-                dt = datetime.fromisoformat(log["logged_at"])
-            except Exception:
-                continue
-            if dt.date() == d:
-                try:
-                    total += int(log.get("amount_ml", 0))
-                except Exception:
-                    continue
-        results.append({"date": d, "total_ml": total})
-    return results
-
-def get_today_total() -> int:
-    logs = read_logs()
-    today = date.today()
-    total = 0
-    for log in logs:
+    }
+    before = summarize()
+    append_jsonl(LOGS_FILE, entry)
+    _clear_log_caches()
+    # Patch the pre-append summary with this entry rather than re-aggregating
+    # the whole file just for the badge check.
+    totals = [
+        dict(t, total_ml=t["total_ml"] + entry["amount_ml"]) if t["date"].isoformat() == entry["date"] else t
+        for t in before["daily"][-7:]
+    ]
+    check_badges_and_streaks(totals, before["count"] + 1, profile=profile, goal=goal)
+
+@st.cache_data(show_spinner=False)
+def _summarize(mtime_ns: int, today: date, days: int) -> Dict:
+    logs, keys = read_logs_index()
+    count = len(logs)
+    window = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+    # skip history before the window when it is in order, else scan it all
+    start = bisect.bisect_left(keys, window[0].isoformat(), 0, count) if keys is not None else 0
+    # bucket by "date", or the logged_at prefix for older entries
+    by_day = Counter()
+    for i in range(start, count):
+        log = logs[i]
         try:
-            dt = datetime.fromisoformat(log["logged_at"])
+            by_day[log.get("date") or log["logged_at"][:10]] += int(log.get("amount_ml", 0))
         except Exception:
             continue
-        if dt.date() == today:
-            try:
-                total += int(log.get("amount_ml", 0))
-            except Exception:
-                continue
-    return total
+    daily = [{"date": d, "total_ml": by_day.get(d.isoformat(), 0)} for d in window]
+    return {"daily": daily, "count": count}
+
+def logs_mtime_ns() -> int:
+    try:
+        return LOGS_FILE.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+def summarize(days: int = SUMMARY_DAYS) -> Dict:
+    return _summarize(logs_mtime_ns(), date.today(), days)
+
+def get_totals_for_days(days: int = 7) -> List[Dict]:
+    return summarize(max(days, SUMMARY_DAYS))["daily"][-days:]
+
+def avg_total_ml(days: int) -> float:
+    # Mean daily total over the last `days` days, zero days included.
+    recent = get_totals_for_days(days)
+    return sum(t["total_ml"] for t in recent) / max(1, len(recent))
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _logs_frame(mtime_ns: int) -> "pd.DataFrame":
+    import pandas as pd
 
-def export_logs_df() -> pd.DataFrame:
     logs = read_logs()
-    if not logs:
-        return pd.DataFrame(columns=["logged_at", "amount_ml"])
-    df = pd.DataFrame(logs)
-    if "logged_at" in df.columns and "amount_ml" in df.columns:
-        df = df[["logged_at", "amount_ml"]]
-    return df
+    # Pull the two columns straight out of the parsed rows (no row-wise
+    # DataFrame in between) and type them; unparseable values become
+    # NaT/<NA> rather than dropping the row.
+    logged_at = pd.Series([log.get("logged_at") for log in logs], dtype=object)
+    amount_ml = pd.Series([log.get("amount_ml") for log in logs], dtype=object)
+    return pd.DataFrame({
+        "logged_at": pd.to_datetime(logged_at, errors="coerce", format="ISO8601"),
+        "amount_ml": pd.to_numeric(amount_ml, errors="coerce").astype("Int64"),
+    })
 
-def export_logs_csv_bytes() -> bytes:
-    df = export_logs_df()
+def export_logs_df() -> "pd.DataFrame":
+    # Keyed on the logs file mtime, like summarize(), so reruns that did not
+    # log anything reuse the frame.
+    return _logs_frame(logs_mtime_ns())
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _logs_csv(mtime_ns: int) -> bytes:
+    # Two plain columns: stream the raw rows through csv.writer rather than
+    # building a DataFrame just to call to_csv.
     buf = io.StringIO()
-    df.to_csv(buf, index=False)
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(["logged_at", "amount_ml"])
+    writer.writerows((log.get("logged_at", ""), log.get("amount_ml", "")) for log in read_logs(copy=False))
     return buf.getvalue().encode("utf-8")
 
+def export_logs_csv_bytes() -> bytes:
+    # The download button needs its bytes on every run; only rebuild them
+    # when the logs file has changed.
+    return _logs_csv(logs_mtime_ns())
+
+migrate_legacy_logs()
+
 # ---------------------------
 # Business logic
 # ---------------------------
@@ -152,15 +422,10 @@ def estimate_bottles_saved(total_ml: float, bottle_size_ml: int = 500) -> float:
     except Exception:
         return 0.0
 
-def predictor_adjustment() -> float:
-    totals = get_totals_for_days(7)
-    recent = totals[-3:] if len(totals) >= 3 else totals
-    count = len(recent) if len(recent) > 0 else 1
-    avg = sum(t['total_ml'] for t in recent) / count
-    profile = get_profile()
+def predictor_adjustment(profile: Optional[Dict], goal: int) -> float:
     if not profile:
         return 1.0
-    goal = calculate_goal_ml(profile['weight_kg'], age=profile.get('age'), activity=profile.get('activity', 'normal'))
+    avg = avg_total_ml(3)
     if avg < 0.7 * goal:
         return 1.2
     elif avg < 0.9 * goal:
@@ -171,85 +436,117 @@ def predictor_adjustment() -> float:
 # ---------------------------
 # Badges & streaks (file-based)
 # ---------------------------
+BADGE_NAMES = ("7-day-streak", "first-log")
+
 def read_badges():
     return read_json(BADGES_FILE, [])
 
 def write_badges(badges):
     write_json(BADGES_FILE, badges)
+    _badge_listing.clear()
+
+def check_badges_and_streaks(totals: List[Dict], log_count: int, profile: Optional[Dict] = None, goal: Optional[int] = None):
+    # Badges are never revoked, so once this session has seen every badge
+    # earned there is nothing left to check.
+    if 'earned_badges' not in st.session_state:
+        st.session_state['earned_badges'] = {name for name, _ in get_badges()}
+    earned = st.session_state['earned_badges']
+    if earned.issuperset(BADGE_NAMES):
+        return
 
-def check_badges_and_streaks():
-    profile = get_profile()
+    if profile is None:
+        profile = get_profile()
     if not profile:
         return
 
     badges = read_badges()
     existing_names = {b.get('name') for b in badges}
+    earned.update(existing_names)
 
-    totals = get_totals_for_days(7)
-    goal = calculate_goal_ml(profile['weight_kg'], age=profile.get('age'), activity=profile.get('activity', 'normal'))
-    good_days = sum(1 for t in totals if t['total_ml'] >= 0.75 * goal)
-
+    now = datetime.utcnow().isoformat()
     new_badges = []
-    # Award 7-day streak
-    if good_days == 7 and "7-day-streak" not in existing_names:
-        new_badges.append({"name": "7-day-streak", "earned_at": datetime.utcnow().isoformat()})
+    # Award 7-day streak; the goal is only needed while it is unearned
+    if "7-day-streak" not in existing_names:
+        if goal is None:
+            goal = calculate_goal_ml(profile['weight_kg'], age=profile.get('age'), activity=profile.get('activity', 'normal'))
+        threshold = 0.75 * goal
+        # all() stops at the first day under threshold
+        if len(totals) == 7 and all(t['total_ml'] >= threshold for t in totals):
+            new_badges.append({"name": "7-day-streak", "earned_at": now})
 
     # Award first-log
-    logs = read_logs()
-    if len(logs) >= 1 and "first-log" not in existing_names:
-        new_badges.append({"name": "first-log", "earned_at": datetime.utcnow().isoformat()})
+    if "first-log" not in existing_names and log_count >= 1:
+        new_badges.append({"name": "first-log", "earned_at": now})
 
     if new_badges:
         badges.extend(new_badges)
         # ensure uniqueness
         unique = {b["name"]: b for b in badges}
         write_badges(list(unique.values()))
+        earned.update(b["name"] for b in new_badges)
 
-def get_badges() -> List[Tuple[str, str]]:
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _badge_listing(mtime_ns: int) -> Tuple[Tuple[str, str], ...]:
+    # Immutable, so every rerun and session can share the one built tuple
+    # until badges.json changes.
     badges = read_badges()
     # sort descending by earned_at if present
     def key_fn(b):
         return b.get("earned_at", "")
     badges_sorted = sorted(badges, key=key_fn, reverse=True)
-    return [(b.get("name", ""), b.get("earned_at", "")) for b in badges_sorted]
+    return tuple((b.get("name", ""), b.get("earned_at", "")) for b in badges_sorted)
+
+def get_badges() -> List[Tuple[str, str]]:
+    try:
+        mtime_ns = BADGES_FILE.stat().st_mtime_ns
+    except OSError:
+        return []
+    return list(_badge_listing(mtime_ns))
 
 # ---------------------------
-# Visuals (matplotlib)
+# Visuals
 # ---------------------------
-def plot_progress_donut(consumed_ml: int, goal_ml: int):
+def plot_progress_donut(consumed_ml: int, goal_ml: int) -> str:
+    # Two arcs and two labels: written straight as SVG, no matplotlib. The
+    # progress arc is a dashed stroke on a circle, started at 12 o'clock.
     pct = min(1.0, consumed_ml / max(1, goal_ml))
-    fig, ax = plt.subplots(figsize=(3.4, 3.4), dpi=80)
-    ax.axis('equal')
-    sizes = [pct, 1 - pct]
-    colors = ["#00E5FF", "#04262B"]
-    ax.pie(sizes, startangle=90, colors=colors, wedgeprops=dict(width=0.38))
-    c = Circle((0, 0), 0.62, color="#071927")
-    ax.add_patch(c)
-    ax.text(0, 0.08, f"{int(pct*100)}%", ha='center', va='center', fontsize=18, color="#CFF8FF", weight='bold')
-    ax.text(0, -0.18, f"{int(consumed_ml)} / {int(goal_ml)} ml", ha='center', va='center', fontsize=9, color="#AEEFF6")
-    ax.set_xticks([])
-    ax.set_yticks([])
-    fig.patch.set_facecolor('#071927')
-    ax.set_facecolor('#071927')
-    plt.tight_layout()
-    return fig
-
-def plot_weekly_bars(totals: List[Dict], goal: int):
-    dates = [t['date'].strftime("%a") for t in totals]
-    vals = [t['total_ml'] for t in totals]
-    fig, ax = plt.subplots(figsize=(6, 3.2), dpi=80)
-    bars = ax.bar(dates, vals, color="#00CFEA", alpha=0.95)
-    ax.axhline(goal, color='#89F9FF', linestyle='--', linewidth=1)
-    ax.set_ylabel("ml")
-    ax.set_title("Weekly Hydration (ml)")
-    for rect, v in zip(bars, vals):
-        height = rect.get_height()
-        offset = max(10, 0.02 * max(1, goal))
-        ax.text(rect.get_x() + rect.get_width() / 2, height + offset, str(int(v)), ha='center', fontsize=8, color="#DFF9FF")
-    ax.set_facecolor('#071927')
-    fig.patch.set_facecolor('#071927')
-    plt.tight_layout()
-    return fig
+    radius, width = 32.4, 15.2
+    circ = 2 * math.pi * radius
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="272" height="272" viewBox="0 0 100 100">'
+        '<rect width="100" height="100" fill="#071927"/>'
+        f'<circle cx="50" cy="50" r="{radius}" fill="none" stroke="#04262B" stroke-width="{width}"/>'
+        f'<circle cx="50" cy="50" r="{radius}" fill="none" stroke="#00E5FF" stroke-width="{width}" '
+        f'stroke-dasharray="{pct * circ:.2f} {circ:.2f}" transform="rotate(-90 50 50)"/>'
+        '<text x="50" y="47" text-anchor="middle" dominant-baseline="middle" font-family="sans-serif" '
+        f'font-size="7.4" font-weight="bold" fill="#CFF8FF">{int(pct*100)}%</text>'
+        '<text x="50" y="57" text-anchor="middle" dominant-baseline="middle" font-family="sans-serif" '
+        f'font-size="3.7" fill="#AEEFF6">{int(consumed_ml)} / {int(goal_ml)} ml</text>'
+        '</svg>'
+    )
+
+def plot_weekly_bars(totals: List[Dict], goal: int) -> "alt.LayerChart":
+    # A Vega-Lite spec drawn by the browser: no Python-side rendering at all.
+    # altair ships with streamlit, so the lazy import is cheap.
+    import altair as alt
+
+    days = alt.Data(values=[{"day": t['date'].strftime("%a"), "ml": int(t['total_ml'])} for t in totals])
+    x = alt.X("day:N", sort=None, title=None)
+    y = alt.Y("ml:Q", title="ml")
+    bars = alt.Chart(days).mark_bar(color="#00CFEA", opacity=0.95).encode(x=x, y=y)
+    labels = alt.Chart(days).mark_text(dy=-6, fontSize=10, color="#DFF9FF").encode(x=x, y=y, text="ml:Q")
+    goal_line = alt.Chart(alt.Data(values=[{"ml": int(goal)}])).mark_rule(
+        color="#89F9FF", strokeDash=[4, 4]
+    ).encode(y=y)
+    # Same dark tile as the donut, so the light label and rule colours read on any theme
+    return (
+        (bars + labels + goal_line)
+        .properties(width="container", height=260, title="Weekly Hydration (ml)")
+        .configure(background="#071927")
+        .configure_view(strokeWidth=0)
+        .configure_axis(labelColor="#AEEFF6", titleColor="#AEEFF6", domainColor="#2A4A5A", tickColor="#2A4A5A", gridColor="#0E3344")
+        .configure_title(color="#CFF8FF")
+    )
 
 # ---------------------------
 # Initialize session state keys used for reminders
@@ -260,28 +557,11 @@ if 'reminders_enabled' not in st.session_state:
     st.session_state['reminders_enabled'] = False
 
 # ---------------------------
-# App header
-# ---------------------------
-col1, col2 = st.columns([1, 3])
-with col1:
-    st.image("https://img.icons8.com/fluency/96/water.png", width=72)
-with col2:
-    st.markdown("<h1 style='margin-bottom:0px; color:#00E5FF'>Water Buddy</h1>", unsafe_allow_html=True)
-    
-
-st.markdown("---")
-
-# ---------------------------
-# Sidebar: Profile + Quick actions + Reminders
+# Sidebar fragments: widget edits inside these rerun only the fragment,
+# not the whole app. Actions that change data still trigger a full rerun.
 # ---------------------------
-with st.sidebar:
-    st.markdown("### Profile")
-    profile = get_profile()
-    if profile:
-        st.markdown(f"**{profile.get('name','You')}**  \\nAge: {profile.get('age','-')}  \\nWeight: {profile.get('weight_kg','-')} kg  \\nActivity: {profile.get('activity','-')}")
-    else:
-        st.info("No profile set yet. Fill the form below and click Save.")
-
+@st.fragment
+def profile_editor(profile: Optional[Dict]):
     with st.expander("Edit / Create profile"):
         name = st.text_input("Name", value=profile['name'] if profile and profile.get('name') else "")
         age = st.number_input("Age", min_value=1, max_value=120, value=int(profile['age']) if profile and profile.get('age') is not None else 25)
@@ -294,51 +574,38 @@ with st.sidebar:
             st.success("Profile saved.")
             st.rerun()
 
-    st.markdown("---")
+@st.fragment
+def quick_log(profile: Optional[Dict], goal: int):
     st.markdown("### Quick Log")
     qcol1, qcol2 = st.columns(2)
     with qcol1:
         if st.button("+50 ml"):
-            log_water_ml(50)
+            log_water_ml(50, profile=profile, goal=goal)
             st.success("Logged 50 ml")
             st.rerun()
         if st.button("+250 ml"):
-            log_water_ml(250)
+            log_water_ml(250, profile=profile, goal=goal)
             st.success("Logged 250 ml")
             st.rerun()
     with qcol2:
         if st.button("+100 ml"):
-            log_water_ml(100)
+            log_water_ml(100, profile=profile, goal=goal)
             st.success("Logged 100 ml")
             st.rerun()
         if st.button("+500 ml"):
-            log_water_ml(500)
+            log_water_ml(500, profile=profile, goal=goal)
             st.success("Logged 500 ml")
             st.rerun()
 
     st.markdown("Custom log (ml)")
     custom_ml = st.number_input("", min_value=1, step=50, value=250, key="custom_ml_input")
     if st.button("Log custom"):
-        log_water_ml(custom_ml)
+        log_water_ml(custom_ml, profile=profile, goal=goal)
         st.success(f"Logged {custom_ml} ml")
         st.rerun()
 
-    st.markdown("---")
-    st.markdown("### Reminders (browser)")
-    default_interval = int(st.session_state.get("rem_int", 60))
-    remind_interval = st.number_input("Interval (minutes)", min_value=5, max_value=240, value=default_interval, step=5, key="rem_int_input")
-    if st.button("Enable reminders"):
-        st.session_state['reminders_enabled'] = True
-        st.session_state['rem_int'] = int(remind_interval)
-        # call client-side start (script below exposes window.startWaterBuddyReminders)
-        st.components.v1.html("<script>window.startWaterBuddyReminders && window.startWaterBuddyReminders();</script>", height=0)
-        st.success(f"Reminders enabled every {int(remind_interval)} minutes (browser notifications).")
-    if st.button("Disable reminders"):
-        st.session_state['reminders_enabled'] = False
-        st.components.v1.html("<script>window.stopWaterBuddyReminders && window.stopWaterBuddyReminders();</script>", height=0)
-        st.info("Reminders disabled.")
-
-    st.markdown("---")
+@st.fragment
+def utilities():
     st.markdown("### Utilities")
     csv_bytes = export_logs_csv_bytes()
     st.download_button("Export logs CSV", data=csv_bytes, file_name="water_buddy_logs.csv", mime="text/csv")
@@ -351,8 +618,22 @@ with st.sidebar:
             st.info("No badges yet.")
 
 # ---------------------------
-# Main area
+# App header
 # ---------------------------
+col1, col2 = st.columns([1, 3])
+with col1:
+    st.image("https://img.icons8.com/fluency/96/water.png", width=72)
+with col2:
+    st.markdown("<h1 style='margin-bottom:0px; color:#00E5FF'>Water Buddy</h1>", unsafe_allow_html=True)
+    
+
+st.markdown("---")
+
+# ---------------------------
+# Sidebar: Profile + Quick actions + Reminders
+# ---------------------------
+# Profile, goal and the daily summary are computed once per run and shared
+# by the sidebar (including the log buttons) and the main area.
 profile = get_profile()
 if profile:
     try:
@@ -362,18 +643,56 @@ if profile:
 else:
     goal = 2000
 
-today = get_today_total()
+# Every chart and insight below is a slice or sum of this one cached summary.
+summary = summarize()
+totals = summary["daily"][-7:]
+today = totals[-1]["total_ml"]
+total_week = sum(t['total_ml'] for t in totals)
+avg14 = int(avg_total_ml(14))
+bottles = estimate_bottles_saved(total_week, 500)
+
+with st.sidebar:
+    st.markdown("### Profile")
+    if profile:
+        st.markdown(f"**{profile.get('name','You')}**  \\nAge: {profile.get('age','-')}  \\nWeight: {profile.get('weight_kg','-')} kg  \\nActivity: {profile.get('activity','-')}")
+    else:
+        st.info("No profile set yet. Fill the form below and click Save.")
+
+    profile_editor(profile)
+
+    st.markdown("---")
+    quick_log(profile, goal)
+
+    st.markdown("---")
+    st.markdown("### Reminders (browser)")
+    default_interval = int(st.session_state.get("rem_int", 60))
+    remind_interval = st.number_input("Interval (minutes)", min_value=5, max_value=240, value=default_interval, step=5, key="rem_int_input")
+    if st.button("Enable reminders"):
+        st.session_state['reminders_enabled'] = True
+        st.session_state['rem_int'] = int(remind_interval)
+        # call client-side start (script below exposes window.startWaterBuddyReminders)
+        st.components.v1.html("<script>window.startWaterBuddyReminders && window.startWaterBuddyReminders();</script>", height=0)
+        st.success(f"Reminders enabled every {int(remind_interval)} minutes (browser notifications).")
+    if st.button("Disable reminders"):
+        st.session_state['reminders_enabled'] = False
+        st.components.v1.html("<script>window.stopWaterBuddyReminders && window.stopWaterBuddyReminders();</script>", height=0)
+        st.info("Reminders disabled.")
+
+    st.markdown("---")
+    utilities()
+
+# ---------------------------
+# Main area
+# ---------------------------
 st.markdown(f"### Goal: **{goal} ml**  —  Today: **{today} ml**")
 
 left_col, right_col = st.columns([1, 2])
 with left_col:
     st.markdown("#### Progress")
-    fig = plot_progress_donut(today, goal)
-    st.pyplot(fig)
-    plt.close(fig)
+    st.image(plot_progress_donut(today, goal))
 
     st.markdown("#### AI Suggestion")
-    adj = predictor_adjustment()
+    adj = predictor_adjustment(profile, goal)
     if adj > 1.05:
         st.info("We noticed recent intake is below goal — consider smaller frequent sips. We'll nudge more often.")
     else:
@@ -381,20 +700,13 @@ with left_col:
 
 with right_col:
     st.markdown("#### Weekly Hydration")
-    totals = get_totals_for_days(7)
-    fig2 = plot_weekly_bars(totals, goal)
-    st.pyplot(fig2)
-    plt.close(fig2)
+    st.altair_chart(plot_weekly_bars(totals, goal))
 
 st.markdown("### Insights")
 col_a, col_b, col_c = st.columns(3)
 with col_a:
-    totals14 = get_totals_for_days(14)
-    avg14 = int(sum(t['total_ml'] for t in totals14) / max(1, len(totals14)))
     st.metric("14-day average (ml)", avg14)
 with col_b:
-    total_week = sum(t['total_ml'] for t in totals)
-    bottles = estimate_bottles_saved(total_week, 500)
     st.metric("This week's total (ml)", int(total_week))
     st.metric("Refill bottles (500ml)", f"{bottles:.1f}")
 with col_c:
@@ -416,7 +728,7 @@ with eco_col1:
     st.write(f"Estimated CO₂ saved: **{co2_saved_kg:.2f} kg**")
 with eco_col2:
     if st.button("Log 250 ml (quick)"):
-        log_water_ml(250)
+        log_water_ml(250, profile=profile, goal=goal)
         st.success("Logged 250 ml")
         st.rerun()
 
@@ -425,54 +737,23 @@ st.markdown("### How suggestions are generated")
 st.write("The predictor checks the last few days' average vs. your daily goal and adjusts nudges if you're below 70% or 90% thresholds.")
 
 with st.expander("Show raw logs"):
-    df = export_logs_df()
-    if df.empty:
-        st.info("No logs yet.")
-    else:
-        st.dataframe(df)
+    # The expander body runs even while collapsed, so the table (and pandas)
+    # is only loaded once the user asks for it.
+    if st.toggle("Load logs table", key="show_raw"):
+        df = export_logs_df()
+        if df.empty:
+            st.info("No logs yet.")
+        else:
+            st.dataframe(df)
 
 # ---------------------------
 # Notification JS (client-side reminders)
 # ---------------------------
 # This script defines start/stop and auto-starts if session_state enabled.
-notification_js = f"""
-<script>
-const intervalMinutes = {int(st.session_state.get('rem_int', 60))};
-let timerId = null;
-function askPermissionAndStart() {{
-    if (!("Notification" in window)) {{
-        console.log("This browser does not support notifications.");
-        return;
-    }}
-    if (Notification.permission === "granted") {{
-        startTimer();
-    }} else if (Notification.permission !== "denied") {{
-        Notification.requestPermission().then(permission => {{
-            if (permission === "granted") startTimer();
-        }});
-    }}
-}}
-function startTimer() {{
-    if (timerId) clearInterval(timerId);
-    timerId = setInterval(() => {{
-        const notif = new Notification("Water Buddy — Time to sip!", {{
-            body: "Open the app to log a quick drink. Stay hydrated! 💧",
-            icon: ""
-        }});
-        setTimeout(()=>notif.close(), 8000);
-    }}, intervalMinutes * 60 * 1000);
-}}
-function stopTimer() {{
-    if (timerId) clearInterval(timerId);
-    timerId = null;
-}}
-window.startWaterBuddyReminders = askPermissionAndStart;
-window.stopWaterBuddyReminders = stopTimer;
-if ({'true' if st.session_state.get('reminders_enabled', False) else 'false'}) {{
-    askPermissionAndStart();
-}}
-</script>
-"""
+notification_js = NOTIFICATION_JS.substitute(
+    interval_minutes=int(st.session_state.get('rem_int', 60)),
+    auto_start='true' if st.session_state.get('reminders_enabled', False) else 'false',
+)
 st.components.v1.html(notification_js, height=0)
 
 